@@ -1,23 +1,74 @@
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
 from typing import Dict, List, Any
 
-from PyPDF2 import PdfFileReader, PdfFileWriter
+import numpy as np
+import pikepdf
 
 from .core import TableList
 from .parsers import Stream, Lattice
 from .utils import (
+    _HAS_FITZ,
     TemporaryDirectory,
     get_page_layout,
-    get_char_and_text_objects,
+    get_all_objects,
     get_rotation,
+    get_page_rotation_with_fitz,
+    open_with_fitz,
+    repair_with_fitz,
+    suppress_mupdf_errors,
     is_url,
     download_url,
+    get_layout_cache_key,
+    load_cached_layout,
+    save_cached_layout,
 )
 
 
+def _process_block(flavor, kwargs, block, suppress_stdout=False, layout_kwargs={}):
+    """Extracts tables from a block of single page PDFs in a worker
+    process. The parser is instantiated once per block so that its
+    setup cost is paid once per block instead of once per page.
+
+    Parameters
+    ----------
+    flavor : str
+        The parsing method to use ('lattice' or 'stream').
+    kwargs : dict
+        See camelot.read_pdf kwargs.
+    block : list
+        List of page_info dicts, see PDFHandler._save_page.
+    suppress_stdout : bool, optional (default: False)
+        Suppress logs and warnings.
+    layout_kwargs : dict, optional (default: {})
+        A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+
+    Returns
+    -------
+    tables_per_page : list
+        List with the list of camelot.core.Table objects found on
+        each page of the block.
+
+    """
+    with warnings.catch_warnings():
+        if suppress_stdout:
+            warnings.simplefilter("ignore")
+        parser = Lattice(**kwargs) if flavor == "lattice" else Stream(**kwargs)
+        return [
+            parser.extract_tables(
+                page_info, suppress_stdout=suppress_stdout, layout_kwargs=layout_kwargs
+            )
+            for page_info in block
+        ]
+
+
 class PDFHandler(object):
     """Handles all operations like temp directory creation, splitting
     file into single page PDFs, parsing each PDF and then removing the
@@ -32,10 +83,29 @@ class PDFHandler(object):
         Example: '1,3,4' or '1,4-end' or 'all'.
     password : str, optional (default: None)
         Password for decryption.
+    cache_dir : str, optional (default: None)
+        Directory in which page layouts are cached across runs.
+        Defaults to the ``CAMELOT_CACHE_DIR`` environment variable,
+        caching is disabled when neither is set.
+    force_layout_rotation : bool, optional (default: False)
+        Probe every page for rotated text. By default, pages whose
+        content cannot draw sideways text are taken as upright
+        without being probed.
+
+    Used as a context manager, the handler keeps a single temp
+    directory and the split pages with their layouts for as long as it
+    is open, so that successive calls to parse share them.
 
     """
 
-    def __init__(self, filepath, pages="1", password=None):
+    def __init__(
+        self,
+        filepath,
+        pages="1",
+        password=None,
+        cache_dir=None,
+        force_layout_rotation=False,
+    ):
         if is_url(filepath):
             filepath = download_url(filepath)
         self.filepath = filepath
@@ -48,8 +118,146 @@ class PDFHandler(object):
             self.password = password
             if sys.version_info[0] < 3:
                 self.password = self.password.encode("ascii")
+
+        if cache_dir is None:
+            cache_dir = os.environ.get("CAMELOT_CACHE_DIR")
+        self.cache_dir = cache_dir
+        self.force_layout_rotation = force_layout_rotation
+
+        # opened lazily, only when the PDF actually needs to be read
+        self._reader = None
+        self._fitz_doc = None
+        self._fitz_failed = False
+        self._num_pages = None
+        # set up by __enter__, see _get_session_pages
+        self._session = None
+        self._session_pages = {}
         self.pages = self._get_pages(pages)
 
+    def __enter__(self):
+        if self._session is None:
+            self._session = TemporaryDirectory()
+            self._session.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Closes the source PDF if it was opened, and removes the
+        session temp directory if there is one."""
+        reader = getattr(self, "_reader", None)
+        if reader is not None:
+            reader.close()
+        self._reader = None
+        fitz_doc = getattr(self, "_fitz_doc", None)
+        if fitz_doc is not None:
+            fitz_doc.close()
+        self._fitz_doc = None
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.__exit__(None, None, None)
+        self._session = None
+        self._session_pages = {}
+
+    def _get_reader(self):
+        """Returns the decrypted source PDF, which is opened on first use
+        and reused afterwards.
+
+        Returns
+        -------
+        infile : pikepdf.Pdf
+
+        """
+        if self._reader is None:
+            try:
+                self._reader = pikepdf.open(self.filepath, password=self.password)
+            except pikepdf.PasswordError as e:
+                raise ValueError(
+                    f"{self.filepath}: file has not been decrypted, check the password"
+                ) from e
+            except pikepdf.PdfError as e:
+                self._reader = self._repair_reader(e)
+        return self._reader
+
+    def _repair_reader(self, error):
+        """Opens a PDF that pikepdf cannot read, once it is repaired by
+        PyMuPDF.
+
+        Parameters
+        ----------
+        error : pikepdf.PdfError
+            The error raised when opening the PDF.
+
+        Returns
+        -------
+        infile : pikepdf.Pdf
+
+        """
+        message = f"{self.filepath}: file is damaged and could not be read"
+        if not _HAS_FITZ:
+            raise ValueError(f"{message}, installing PyMuPDF may repair it") from error
+        try:
+            data = repair_with_fitz(self.filepath, password=self.password)
+            return pikepdf.open(io.BytesIO(data))
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(message) from e
+
+    def _get_fitz_doc(self):
+        """Returns the source PDF opened with PyMuPDF, used to detect
+        page rotation without serializing the page first.
+
+        Returns
+        -------
+        doc : fitz.Document
+
+        """
+        if self._fitz_doc is None:
+            self._fitz_doc = open_with_fitz(self.filepath, password=self.password)
+        return self._fitz_doc
+
+    def _get_rotation_with_fitz(self, page):
+        """Detects page rotation with PyMuPDF, see
+        camelot.utils.get_page_rotation_with_fitz.
+
+        Parameters
+        ----------
+        page : int
+            Page number.
+
+        Returns
+        -------
+        rotation : string or None
+            None if PyMuPDF cannot read the page, which is then probed
+            with PDFMiner instead.
+
+        """
+        if self._fitz_failed:
+            return None
+        try:
+            return get_page_rotation_with_fitz(self._get_fitz_doc()[page - 1])
+        except Exception:
+            # pikepdf may read files or pages that MuPDF cannot
+            self._fitz_failed = self._fitz_doc is None
+            return None
+
+    def _get_num_pages(self):
+        """Returns the number of pages in the source PDF.
+
+        Returns
+        -------
+        num_pages : int
+
+        """
+        if self._num_pages is None:
+            self._num_pages = len(self._get_reader().pages)
+        return self._num_pages
+
     def _get_pages(self, pages):
         """Converts pages string to list of ints.
 
@@ -69,80 +277,300 @@ class PDFHandler(object):
         """
         page_numbers = []
 
-        if pages == "1":
-            page_numbers.append({"start": 1, "end": 1})
+        if pages == "all":
+            page_numbers.append({"start": 1, "end": self._get_num_pages()})
         else:
-            with open(self.filepath, "rb") as f:
-                infile = PdfFileReader(f, strict=False)
-
-                if infile.isEncrypted:
-                    infile.decrypt(self.password)
-
-                if pages == "all":
-                    page_numbers.append({"start": 1, "end": infile.getNumPages()})
+            for r in pages.split(","):
+                if "-" in r:
+                    a, b = r.split("-")
+                    if b == "end":
+                        b = self._get_num_pages()
+                    page_numbers.append({"start": int(a), "end": int(b)})
                 else:
-                    for r in pages.split(","):
-                        if "-" in r:
-                            a, b = r.split("-")
-                            if b == "end":
-                                b = infile.getNumPages()
-                            page_numbers.append({"start": int(a), "end": int(b)})
-                        else:
-                            page_numbers.append({"start": int(r), "end": int(r)})
+                    page_numbers.append({"start": int(r), "end": int(r)})
+
+        n_pages = sum(max(0, p["end"] - p["start"] + 1) for p in page_numbers)
+        if n_pages > 1024:
+            # sort and dedupe large selections (e.g. 'all') in NumPy
+            P = np.unique(
+                np.concatenate(
+                    [np.arange(p["start"], p["end"] + 1) for p in page_numbers]
+                )
+            )
+            return P.tolist()
 
         P = []
         for p in page_numbers:
             P.extend(range(p["start"], p["end"] + 1))
         return sorted(set(P))
 
-    def _save_page(self, filepath, page, temp, layout_kwargs={}):
-        """Saves specified page from PDF into a temporary directory.
+    def _save_pages(self, pages, temp, layout_kwargs={}, write=True):
+        """Saves specified pages from PDF into a temporary directory,
+        reusing a single reader for the source PDF. Pages are saved one
+        at a time, as the result is consumed.
 
         Parameters
         ----------
-        filepath : str
-            Filepath or URL of the PDF file.
-        page : int
-            Page number.
+        pages : list
+            List of int page numbers.
         temp : str
             Tmp directory.
+        layout_kwargs : dict, optional (default: {})
+            A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+        write : bool, optional (default: True)
+            Write the single page PDFs to disk.
+
+        Yields
+        ------
+        page_info : dict
+            Dict with the file, layout and dimensions of each page.
 
         """
-        with open(filepath, "rb") as fileobj:
-            infile = PdfFileReader(fileobj, strict=False)
-            if infile.isEncrypted:
-                infile.decrypt(self.password)
+        infile = self._get_reader()
+        for page in pages:
             fpath = os.path.join(temp, f"page-{page}.pdf")
-            froot, fext = os.path.splitext(fpath)
-            p = infile.getPage(page - 1)
-            outfile = PdfFileWriter()
-            outfile.addPage(p)
-            with open(fpath, "wb") as f:
-                outfile.write(f)
-            layout, dimensions = get_page_layout(fpath, **layout_kwargs)
-            chars, horizontal_text, vertical_text = get_char_and_text_objects(layout)
+            yield self._save_page(
+                infile, page, fpath, layout_kwargs=layout_kwargs, write=write
+            )
+
+    def _get_session_pages(self, layout_kwargs={}):
+        """Yields the split pages kept by the session, splitting and
+        laying out the pages that were not seen yet. Pages are kept per
+        layout_kwargs, since those change both the rotation and the
+        layout of a page.
+
+        Parameters
+        ----------
+        layout_kwargs : dict, optional (default: {})
+            A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+
+        Yields
+        ------
+        page_info : dict
+            Dict with the file, layout and dimensions of each page.
+
+        """
+        key = repr(sorted(layout_kwargs.items()))
+        if key not in self._session_pages:
+            temp = os.path.join(self._session.name, str(len(self._session_pages)))
+            os.mkdir(temp)
+            self._session_pages[key] = (temp, {})
+        temp, saved = self._session_pages[key]
+
+        for page in self.pages:
+            if page not in saved:
+                # always written, a later lattice parse reads the file
+                saved[page] = next(
+                    self._save_pages([page], temp, layout_kwargs=layout_kwargs)
+                )
+            yield saved[page]
+
+    def _save_page(self, infile, page, fpath, layout_kwargs={}, write=True):
+        """Saves specified page from PDF to fpath.
+        The page is analyzed in memory and only written to disk when
+        the parser needs the file.
+
+        Parameters
+        ----------
+        infile : pikepdf.Pdf
+            The (decrypted) source PDF.
+        page : int
+            Page number.
+        fpath : str
+            Path of the single page PDF, named page-<page>.pdf.
+        layout_kwargs : dict, optional (default: {})
+            A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+        write : bool, optional (default: True)
+            Write the single page PDF to disk.
+
+        Returns
+        -------
+        page_info : dict
+            Dict with the file, layout and dimensions of the saved
+            page.
+
+        """
+        outfile = pikepdf.Pdf.new()
+        outfile.pages.append(infile.pages[page - 1])
+
+        cache_key = None
+        if self.cache_dir is not None:
+            cache_key = get_layout_cache_key(self.filepath, page, layout_kwargs)
+            cached = load_cached_layout(self.cache_dir, cache_key)
+            # a forced probe must not reuse the rotation of a skipped one,
+            # entries without the flag were always probed
+            if cached is not None and (
+                cached.get("probed", True) or not self.force_layout_rotation
+            ):
+                if write:
+                    self._rotate_page(outfile.pages[0], cached["rotation"])
+                    outfile.save(fpath)
+                return {
+                    "file": fpath,
+                    "layout": cached["layout"],
+                    "dimensions": cached["dimensions"],
+                }
+
+        # rotation is decided before the page is serialized, so an upright
+        # page is serialized once and a rotated one at most twice
+        layout = None
+        probed = True
+        if not layout_kwargs.get("detect_vertical", True):
+            # PDFMiner finds no vertical text, so nothing would be rotated
+            rotation = ""
+        elif not self.force_layout_rotation and not self._may_be_rotated(
+            outfile.pages[0]
+        ):
+            # no text can be drawn sideways, so there is nothing to probe
+            rotation = ""
+            probed = False
+        else:
+            rotation = self._get_rotation_with_fitz(page) if _HAS_FITZ else None
+        if rotation is None:
+            buf = io.BytesIO()
+            outfile.save(buf)
+            layout, dimensions = get_page_layout(buf, **layout_kwargs)
+            __, chars, horizontal_text, vertical_text = get_all_objects(layout)
             rotation = get_rotation(chars, horizontal_text, vertical_text)
-            if rotation != "":
-                fpath_new = "".join([froot.replace("page", "p"), "_rotated", fext])
-                os.rename(fpath, fpath_new)
-                instream = open(fpath_new, "rb")
-                infile = PdfFileReader(instream, strict=False)
-                if infile.isEncrypted:
-                    infile.decrypt(self.password)
-                outfile = PdfFileWriter()
-                p = infile.getPage(0)
-                if rotation == "anticlockwise":
-                    p.rotateClockwise(90)
-                elif rotation == "clockwise":
-                    p.rotateCounterClockwise(90)
-                outfile.addPage(p)
-                with open(fpath, "wb") as f:
-                    outfile.write(f)
-                instream.close()
-        return {"layout": layout, "dimensions": dimensions}
+        if rotation != "":
+            self._rotate_page(outfile.pages[0], rotation)
+            # the layout has to describe the rotated page
+            layout = None
+        if layout is None:
+            buf = io.BytesIO()
+            outfile.save(buf)
+            layout, dimensions = get_page_layout(buf, **layout_kwargs)
+        if write:
+            with open(fpath, "wb") as f:
+                f.write(buf.getvalue())
+        if cache_key is not None:
+            save_cached_layout(
+                self.cache_dir,
+                cache_key,
+                {
+                    "rotation": rotation,
+                    "probed": probed,
+                    "layout": layout,
+                    "dimensions": dimensions,
+                },
+            )
+        return {"file": fpath, "layout": layout, "dimensions": dimensions}
+
+    @staticmethod
+    def _may_be_rotated(p):
+        """Checks cheaply, without laying out the page, whether it can
+        have sideways text. That is only possible when the page has a
+        /Rotate, or when its content stream draws forms or sets a
+        matrix that rotates or skews.
+
+        Parameters
+        ----------
+        p : pikepdf.Page
+            Single page.
+
+        Returns
+        -------
+        may_be_rotated : bool
+
+        """
+        # a malformed page is left to the probe, which tolerates it
+        try:
+            if int(p.obj.get("/Rotate", 0)) % 360 != 0:
+                return True
+            instructions = pikepdf.parse_content_stream(p, "cm Tm Do")
+            xobjects = p.obj.get("/Resources", {}).get("/XObject", {})
+            for operands, operator in instructions:
+                if str(operator) == "Do":
+                    xobject = xobjects.get(str(operands[0]))
+                    if xobject is None or xobject.get("/Subtype") != "/Image":
+                        return True
+                # non-numeric operands raise a TypeError
+                elif len(operands) != 6 or float(operands[1]) or float(operands[2]):
+                    return True
+        except (pikepdf.PdfError, TypeError, ValueError):
+            return True
+        return False
+
+    @staticmethod
+    def _rotate_page(p, rotation):
+        """Rotates a page to make its text upright. Only the /Rotate
+        entry changes, content streams are copied as is.
+
+        Parameters
+        ----------
+        p : pikepdf.Page
+            Page to rotate.
+        rotation : str
+            Rotation returned by camelot.utils.get_rotation.
+
+        """
+        if rotation == "":
+            return
+        angle = 90 if rotation == "anticlockwise" else -90
+        p.Rotate = (int(p.obj.get("/Rotate", 0)) + angle) % 360
+
+    def _get_max_workers(self, n_jobs):
+        """Returns the number of worker processes to use for parsing.
+
+        Parameters
+        ----------
+        n_jobs : int
+            Requested number of processes. -1 (or any value below 1)
+            uses all available CPUs.
+
+        Returns
+        -------
+        max_workers : int
+
+        """
+        if n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        return max(1, min(n_jobs, len(self.pages)))
+
+    def _extract_tables_per_page(
+        self, saved_pages, flavor, suppress_stdout, layout_kwargs, n_jobs, kwargs
+    ):
+        """Yields the list of tables found on each page, in page order.
+
+        Sequentially, each page is split and parsed before the next one
+        so that only one page layout is held in memory at a time.
+
+        """
+        max_workers = self._get_max_workers(n_jobs)
+        if max_workers == 1:
+            parser = Lattice(**kwargs) if flavor == "lattice" else Stream(**kwargs)
+            for p in saved_pages:
+                yield parser.extract_tables(
+                    p, suppress_stdout=suppress_stdout, layout_kwargs=layout_kwargs
+                )
+        else:
+            page_info: List[Dict[str, Any]] = list(saved_pages)
+            # a few blocks per worker keeps them busy when pages differ
+            # in cost, while the parser is still set up once per block
+            block_size = max(1, len(page_info) // (4 * max_workers))
+            blocks = [
+                page_info[i : i + block_size]
+                for i in range(0, len(page_info), block_size)
+            ]
+            process_block = partial(
+                _process_block,
+                flavor,
+                kwargs,
+                suppress_stdout=suppress_stdout,
+                layout_kwargs=layout_kwargs,
+            )
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                yield from chain.from_iterable(executor.map(process_block, blocks))
 
     def parse(
-        self, flavor="lattice", suppress_stdout=False, layout_kwargs={}, **kwargs
+        self,
+        flavor="lattice",
+        suppress_stdout=False,
+        layout_kwargs={},
+        n_jobs=1,
+        on_page_tables=None,
+        progress_callback=None,
+        **kwargs
     ):
         """Extracts tables by calling parser.get_tables on all single
         page PDFs.
@@ -156,6 +584,16 @@ class PDFHandler(object):
             Suppress logs and warnings.
         layout_kwargs : dict, optional (default: {})
             A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+        n_jobs : int, optional (default: 1)
+            Number of processes used to parse pages in parallel.
+            -1 uses all available CPUs.
+        on_page_tables : callable, optional (default: None)
+            Called as on_page_tables(page, tables) with the list of
+            tables found on each page, in page order. The tables are
+            then not kept, and an empty TableList is returned.
+        progress_callback : callable, optional (default: None)
+            Called as progress_callback(current, total, page) once
+            each page is parsed, where current counts pages from 1.
         kwargs : dict
             See camelot.read_pdf kwargs.
 
@@ -165,21 +603,66 @@ class PDFHandler(object):
             List of tables found in PDF.
 
         """
-        tables = []
+        if self._session is not None:
+            return self._parse_pages(
+                self._get_session_pages(layout_kwargs=layout_kwargs),
+                flavor,
+                suppress_stdout,
+                layout_kwargs,
+                n_jobs,
+                on_page_tables,
+                progress_callback,
+                kwargs,
+            )
         with TemporaryDirectory() as tempdir:
+            # only lattice reads the page files, to convert them to images
+            saved_pages = self._save_pages(
+                self.pages,
+                tempdir,
+                layout_kwargs=layout_kwargs,
+                write=flavor == "lattice",
+            )
+            return self._parse_pages(
+                saved_pages,
+                flavor,
+                suppress_stdout,
+                layout_kwargs,
+                n_jobs,
+                on_page_tables,
+                progress_callback,
+                kwargs,
+            )
 
-            page_layouts: List[Dict[str, Any]] = []
-            for p in self.pages:
-                page_layout_per_page = self._save_page(self.filepath, p, tempdir, layout_kwargs)
-                page_layouts.append(page_layout_per_page)
-
-            pages = [os.path.join(tempdir, f"page-{p}.pdf") for p in self.pages]
-            parser = Lattice(**kwargs) if flavor == "lattice" else Stream(**kwargs)
-
-            for p, page_layout_per_page in zip(pages, page_layouts):
-                t = parser.extract_tables(
-                    p, page_layout_per_page,
-                    suppress_stdout=suppress_stdout, layout_kwargs=layout_kwargs
-                )
-                tables.extend(t)
-        return TableList(sorted(tables))
+    def _parse_pages(
+        self,
+        saved_pages,
+        flavor,
+        suppress_stdout,
+        layout_kwargs,
+        n_jobs,
+        on_page_tables,
+        progress_callback,
+        kwargs,
+    ):
+        """Extracts tables from the split pages, see parse."""
+        tables = []
+        tables_per_page = self._extract_tables_per_page(
+            saved_pages, flavor, suppress_stdout, layout_kwargs, n_jobs, kwargs
+        )
+        try:
+            # pages are sorted and each page's tables are ordered already
+            total = len(self.pages)
+            with suppress_mupdf_errors(suppress_stdout):
+                for current, (page, page_tables) in enumerate(
+                    zip(self.pages, tables_per_page), start=1
+                ):
+                    if on_page_tables is not None:
+                        on_page_tables(page, page_tables)
+                    else:
+                        tables.extend(page_tables)
+                    if progress_callback is not None:
+                        progress_callback(current, total, page)
+        finally:
+            # stop workers before the temp directory is removed
+            tables_per_page.close()
+        return TableList(tables)
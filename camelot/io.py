@@ -13,6 +13,11 @@ def read_pdf(
     flavor="lattice",
     suppress_stdout=False,
     layout_kwargs={},
+    n_jobs=1,
+    cache_dir=None,
+    force_layout_rotation=False,
+    on_page_tables=None,
+    progress_callback=None,
     **kwargs
 ):
     """Read PDF and return extracted tables.
@@ -36,6 +41,27 @@ def read_pdf(
         Print all logs and warnings.
     layout_kwargs : dict, optional (default: {})
         A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+    n_jobs : int, optional (default: 1)
+        Number of processes used to parse pages in parallel.
+        -1 uses all available CPUs.
+    cache_dir : str, optional (default: None)
+        Directory in which page layouts are cached, so that parsing
+        the same file again skips PDFMiner. Defaults to the
+        ``CAMELOT_CACHE_DIR`` environment variable, caching is
+        disabled when neither is set.
+    force_layout_rotation : bool, optional (default: False)
+        Probe every page for rotated text. By default, pages whose
+        content cannot draw sideways text are taken as upright
+        without being probed.
+    on_page_tables : callable, optional (default: None)
+        Called as on_page_tables(page, tables) with the list of
+        tables found on each page, in page order, once the page's
+        tables are available.
+        The tables are then not kept in memory, and an empty
+        TableList is returned.
+    progress_callback : callable, optional (default: None)
+        Called as progress_callback(current, total, page) once
+        each page is parsed, where current counts pages from 1.
     table_areas : list, optional (default: None)
         List of table area strings of the form x1,y1,x2,y2
         where (x1, y1) -> left-top and (x2, y2) -> right-bottom
@@ -108,12 +134,25 @@ def read_pdf(
             warnings.simplefilter("ignore")
 
         validate_input(kwargs, flavor=flavor)
-        p = PDFHandler(filepath, pages=pages, password=password)
-        kwargs = remove_extra(kwargs, flavor=flavor)
-        tables = p.parse(
-            flavor=flavor,
-            suppress_stdout=suppress_stdout,
-            layout_kwargs=layout_kwargs,
-            **kwargs
+        # a single parse, pages are not kept around as in session mode
+        p = PDFHandler(
+            filepath,
+            pages=pages,
+            password=password,
+            cache_dir=cache_dir,
+            force_layout_rotation=force_layout_rotation,
         )
+        try:
+            kwargs = remove_extra(kwargs, flavor=flavor)
+            tables = p.parse(
+                flavor=flavor,
+                suppress_stdout=suppress_stdout,
+                layout_kwargs=layout_kwargs,
+                n_jobs=n_jobs,
+                on_page_tables=on_page_tables,
+                progress_callback=progress_callback,
+                **kwargs
+            )
+        finally:
+            p.close()
         return tables
@@ -1,22 +1,27 @@
 # -*- coding: utf-8 -*-
 
 import os
-from typing import Dict, Optional, Any
+from typing import Dict, Any
 
-from ..utils import get_page_layout, get_image_and_text_objects
+from ..utils import get_page_layout, get_all_objects
 
 
 class BaseParser(object):
     """Defines a base parser."""
 
-    def _generate_layout(self, filename, layout_kwargs, page_layout_per_page: Optional[Dict[str, Any]] = None):
-        self.filename = filename
+    def _generate_layout(self, page_info: Dict[str, Any], layout_kwargs):
+        self.filename = page_info["file"]
         self.layout_kwargs = layout_kwargs
-        if page_layout_per_page is None:
-            self.layout, self.dimensions = get_page_layout(filename, **layout_kwargs)
+        if page_info.get("layout") is not None and page_info.get("dimensions") is not None:
+            self.layout, self.dimensions = page_info["layout"], page_info["dimensions"]
         else:
-            self.layout, self.dimensions = page_layout_per_page["layout"], page_layout_per_page["dimensions"]
-        self.images, self.horizontal_text, self.vertical_text = get_image_and_text_objects(self.layout)
+            self.layout, self.dimensions = get_page_layout(self.filename, **layout_kwargs)
+        (
+            self.images,
+            __,
+            self.horizontal_text,
+            self.vertical_text,
+        ) = get_all_objects(self.layout)
         self.pdf_width, self.pdf_height = self.dimensions
         self.rootname, __ = os.path.splitext(self.filename)
         self.imagename = "".join([self.rootname, ".png"])
@@ -409,8 +409,8 @@ class Lattice(BaseParser):
 
         return table
 
-    def extract_tables(self, filename, suppress_stdout=False, layout_kwargs={}):
-        self._generate_layout(filename, layout_kwargs)
+    def extract_tables(self, page_info, suppress_stdout=False, layout_kwargs={}):
+        self._generate_layout(page_info, layout_kwargs)
         if not suppress_stdout:
             logger.info("Processing {}".format(os.path.basename(self.rootname)))
 
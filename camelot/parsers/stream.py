@@ -444,8 +444,8 @@ class Stream(BaseParser):
 
         return table
 
-    def extract_tables(self, filename, page_layout_per_page, suppress_stdout=False, layout_kwargs={}):
-        self._generate_layout(filename, layout_kwargs, page_layout_per_page=page_layout_per_page)
+    def extract_tables(self, page_info, suppress_stdout=False, layout_kwargs={}):
+        self._generate_layout(page_info, layout_kwargs)
         base_filename = os.path.basename(self.rootname)
 
         if not suppress_stdout:
@@ -2,16 +2,20 @@
 
 import os
 import re
+import pickle
 import random
 import shutil
 import string
+import hashlib
 import tempfile
 import warnings
+from contextlib import contextmanager
 from itertools import groupby
 from operator import itemgetter
 from typing import List, Tuple
 
 import numpy as np
+import pdfminer
 from pdfminer.pdfparser import PDFParser
 from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfpage import PDFPage
@@ -29,6 +33,18 @@ from pdfminer.layout import (
     LTContainer
 )
 
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz
+    except ImportError:
+        _HAS_FITZ = False
+    else:
+        _HAS_FITZ = True
+else:
+    _HAS_FITZ = True
+
 from urllib.request import Request, urlopen
 from urllib.parse import urlparse as parse_url
 from urllib.parse import uses_relative, uses_netloc, uses_params
@@ -298,8 +314,154 @@ def get_rotation(chars, horizontal_text, vertical_text):
     hlen = len([t for t in horizontal_text if t.get_text().strip()])
     vlen = len([t for t in vertical_text if t.get_text().strip()])
     if hlen < vlen:
-        clockwise = sum(t.matrix[1] < 0 and t.matrix[2] > 0 for t in chars)
-        anticlockwise = sum(t.matrix[1] > 0 and t.matrix[2] < 0 for t in chars)
+        # b and c components of each char's CTM
+        char_matrices = np.array(
+            [(t.matrix[1], t.matrix[2]) for t in chars], dtype=np.float32
+        ).reshape(-1, 2)
+        b, c = char_matrices[:, 0], char_matrices[:, 1]
+        clockwise = np.count_nonzero((b < 0) & (c > 0))
+        anticlockwise = np.count_nonzero((b > 0) & (c < 0))
+        rotation = "anticlockwise" if clockwise < anticlockwise else "clockwise"
+    return rotation
+
+
+def open_with_fitz(filename, password=""):
+    """Opens a pdf file with PyMuPDF, decrypting it if needed.
+
+    Parameters
+    ----------
+    filename : string
+        Path to pdf file.
+    password : str, optional (default: '')
+        Password for decryption.
+
+    Returns
+    -------
+    doc : fitz.Document
+        PyMuPDF document object.
+
+    """
+    doc = fitz.open(filename)
+    if doc.needs_pass and not doc.authenticate(password):
+        doc.close()
+        raise ValueError(f"{filename}: file has not been decrypted, check the password")
+    return doc
+
+
+@contextmanager
+def suppress_mupdf_errors(suppress=True):
+    """Turns off the error messages that MuPDF prints by itself while
+    PyMuPDF reads a file, restoring them on exit.
+
+    Parameters
+    ----------
+    suppress : bool, optional (default: True)
+        Leave the messages as they are when False.
+
+    """
+    if not (suppress and _HAS_FITZ):
+        yield
+        return
+    display_errors = fitz.TOOLS.mupdf_display_errors()
+    fitz.TOOLS.mupdf_display_errors(False)
+    try:
+        yield
+    finally:
+        fitz.TOOLS.mupdf_display_errors(display_errors)
+
+
+def repair_with_fitz(filename, password=""):
+    """Rewrites a damaged pdf file with PyMuPDF, which rebuilds broken
+    cross-reference tables while opening it.
+
+    Parameters
+    ----------
+    filename : string
+        Path to pdf file.
+    password : str, optional (default: '')
+        Password for decryption.
+
+    Returns
+    -------
+    data : bytes
+        The repaired, decrypted pdf file.
+
+    """
+    doc = open_with_fitz(filename, password=password)
+    try:
+        return doc.tobytes(encryption=fitz.PDF_ENCRYPT_NONE)
+    finally:
+        doc.close()
+
+
+def get_rotation_with_fitz(filename):
+    """Detects if text on a single page pdf is rotated or not using
+    PyMuPDF, which is much faster than a full PDFMiner layout
+    analysis. The decision follows the same rule as get_rotation.
+
+    Parameters
+    ----------
+    filename : string or file-like
+        Path to pdf file, or a binary file-like object holding it.
+
+    Returns
+    -------
+    rotation : string
+        '' if text in table is upright, 'anticlockwise' if
+        rotated 90 degree anticlockwise and 'clockwise' if
+        rotated 90 degree clockwise.
+
+    """
+    if hasattr(filename, "read"):
+        filename.seek(0)
+        doc = fitz.open(stream=filename.read(), filetype="pdf")
+    else:
+        doc = fitz.open(filename)
+    with doc:
+        return get_page_rotation_with_fitz(doc[0])
+
+
+def get_page_rotation_with_fitz(page):
+    """Detects if text on a PyMuPDF page is rotated or not. See
+    get_rotation_with_fitz.
+
+    Parameters
+    ----------
+    page : fitz.Page
+        PyMuPDF page object.
+
+    Returns
+    -------
+    rotation : string
+        '' if text in table is upright, 'anticlockwise' if
+        rotated 90 degree anticlockwise and 'clockwise' if
+        rotated 90 degree clockwise.
+
+    """
+    # line directions are given in unrotated page space
+    derotation = fitz.Matrix(page.rotation)
+    blocks = page.get_text("dict")["blocks"]
+
+    hlen, vlen = 0, 0
+    clockwise, anticlockwise = 0, 0
+    for block in blocks:
+        for line in block.get("lines", []):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if not text:
+                continue
+            direction = fitz.Point(line["dir"]) * derotation
+            if abs(direction.x) >= abs(direction.y):
+                hlen += 1
+            else:
+                vlen += 1
+                # y grows downwards in PyMuPDF
+                if direction.y > 0:
+                    clockwise += len(text)
+                else:
+                    anticlockwise += len(text)
+
+    rotation = ""
+    if hlen < vlen:
         rotation = "anticlockwise" if clockwise < anticlockwise else "clockwise"
     return rotation
 
@@ -854,8 +1016,8 @@ def get_page_layout(
 
     Parameters
     ----------
-    filename : string
-        Path to pdf file.
+    filename : string or file-like
+        Path to pdf file, or a binary file-like object holding it.
     line_overlap : float
     char_margin : float
     line_margin : float
@@ -872,32 +1034,121 @@ def get_page_layout(
         Dimension of pdf page in the form (width, height).
 
     """
-    with open(filename, "rb") as f:
-        parser = PDFParser(f)
-        document = PDFDocument(parser)
-        if not document.is_extractable:
-            raise PDFTextExtractionNotAllowed(
-                f"Text extraction is not allowed: {filename}"
-            )
-        laparams = LAParams(
-            line_overlap=line_overlap,
-            char_margin=char_margin,
-            line_margin=line_margin,
-            word_margin=word_margin,
-            boxes_flow=boxes_flow,
-            detect_vertical=detect_vertical,
-            all_texts=all_texts,
+    laparams = LAParams(
+        line_overlap=line_overlap,
+        char_margin=char_margin,
+        line_margin=line_margin,
+        word_margin=word_margin,
+        boxes_flow=boxes_flow,
+        detect_vertical=detect_vertical,
+        all_texts=all_texts,
+    )
+    if hasattr(filename, "read"):
+        filename.seek(0)
+        return _get_page_layout(filename, laparams)
+    # PDFParser does many small seeks and reads, use large block reads
+    with open(filename, "rb", buffering=1024 * 1024) as f:
+        return _get_page_layout(f, laparams, filename=filename)
+
+
+def _get_page_layout(f, laparams, filename="<stream>"):
+    parser = PDFParser(f)
+    document = PDFDocument(parser)
+    if not document.is_extractable:
+        raise PDFTextExtractionNotAllowed(
+            f"Text extraction is not allowed: {filename}"
         )
-        rsrcmgr = PDFResourceManager()
-        device = PDFPageAggregator(rsrcmgr, laparams=laparams)
-        interpreter = PDFPageInterpreter(rsrcmgr, device)
-        for page in PDFPage.create_pages(document):
-            interpreter.process_page(page)
-            layout = device.get_result()
-            width = layout.bbox[2]
-            height = layout.bbox[3]
-            dim = (width, height)
-        return layout, dim
+    rsrcmgr = PDFResourceManager()
+    device = PDFPageAggregator(rsrcmgr, laparams=laparams)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    for page in PDFPage.create_pages(document):
+        interpreter.process_page(page)
+        layout = device.get_result()
+        width = layout.bbox[2]
+        height = layout.bbox[3]
+        dim = (width, height)
+    return layout, dim
+
+
+def get_layout_cache_key(filepath, page, layout_kwargs):
+    """Returns the key under which the layout of a page is cached.
+    The key changes whenever the file, the layout kwargs or the
+    PDFMiner version change.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the source pdf file.
+    page : int
+        Page number.
+    layout_kwargs : dict
+        A dict of `pdfminer.layout.LAParams <https://github.com/euske/pdfminer/blob/master/pdfminer/layout.py#L33>`_ kwargs.
+
+    Returns
+    -------
+    key : str
+
+    """
+    stat = os.stat(filepath)
+    key = (
+        os.path.abspath(filepath),
+        stat.st_mtime_ns,
+        stat.st_size,
+        page,
+        sorted(layout_kwargs.items()),
+        pdfminer.__version__,
+    )
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def load_cached_layout(cache_dir, key):
+    """Loads a page layout saved by save_cached_layout.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Cache directory.
+    key : str
+        Key returned by get_layout_cache_key.
+
+    Returns
+    -------
+    page_layout : dict or None
+        Dict with the rotation, layout and dimensions of the page,
+        None if it is not cached (or cannot be read).
+
+    """
+    cache_path = os.path.join(cache_dir, f"{key}.pkl")
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        warnings.warn(f"Ignoring unreadable layout cache file {cache_path}")
+        return None
+
+
+def save_cached_layout(cache_dir, key, page_layout):
+    """Saves a page layout so that later runs can skip PDFMiner.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Cache directory.
+    key : str
+        Key returned by get_layout_cache_key.
+    page_layout : dict
+        Dict with the rotation, layout and dimensions of the page.
+
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"{key}.pkl")
+    # write then rename, so that concurrent readers never see partial files
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(page_layout, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
 
 
 def get_text_objects(layout, ltype="char", t=None):
@@ -940,10 +1191,33 @@ def get_text_objects(layout, ltype="char", t=None):
     return t
 
 
-def get_char_and_text_objects(layout: LTContainer) -> Tuple[
-    List[LTChar], List[LTTextLineHorizontal], List[LTTextLineVertical]]:
-    """Recursively parses pdf layout to get a list of
-    PDFMiner LTChar, LTTextLineHorizontal, LTTextLineVertical objects.
+# (index in the get_all_objects result, is container) for each layout
+# object class seen so far, so that the walk does one dict lookup per
+# object instead of a chain of isinstance checks
+_LAYOUT_OBJECT_KINDS = {}
+
+
+def _layout_object_kind(cls):
+    if issubclass(cls, LTImage):
+        index = 0
+    elif issubclass(cls, LTChar):
+        index = 1
+    elif issubclass(cls, LTTextLineHorizontal):
+        index = 2
+    elif issubclass(cls, LTTextLineVertical):
+        index = 3
+    else:
+        index = None
+    # chars are leaves, even if a subclass happens to be a container
+    is_container = index != 1 and issubclass(cls, LTContainer)
+    kind = _LAYOUT_OBJECT_KINDS[cls] = (index, is_container)
+    return kind
+
+
+def get_all_objects(layout: LTContainer) -> Tuple[
+    List[LTImage], List[LTChar], List[LTTextLineHorizontal], List[LTTextLineVertical]]:
+    """Walks pdf layout once to get lists of PDFMiner LTImage, LTChar,
+    LTTextLineHorizontal and LTTextLineVertical objects.
 
     Parameters
     ----------
@@ -954,34 +1228,55 @@ def get_char_and_text_objects(layout: LTContainer) -> Tuple[
     Returns
     -------
     result : tuple
-        Include List of LTChar objects, list of LTTextLineHorizontal objects
-        and list of LTTextLineVertical objects
+        Include List of LTImage objects, list of LTChar objects,
+        list of LTTextLineHorizontal objects and list of
+        LTTextLineVertical objects, each in layout order.
 
     """
-
+    image = []
     char = []
     horizontal_text = []
     vertical_text = []
+    appends = (image.append, char.append, horizontal_text.append, vertical_text.append)
+
+    kinds = _LAYOUT_OBJECT_KINDS
+    stack = [layout]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        _object = pop()
+        cls = _object.__class__
+        kind = kinds.get(cls)
+        if kind is None:
+            kind = _layout_object_kind(cls)
+        index, is_container = kind
+        if index is not None:
+            appends[index](_object)
+        if is_container:
+            # push children reversed so that they are visited in order
+            extend(reversed(_object._objs))
+    return image, char, horizontal_text, vertical_text
 
-    try:
-        for _object in layout:
-            if isinstance(_object, LTChar):
-                char.append(_object)
-            elif isinstance(_object, LTTextLineHorizontal):
-                horizontal_text.append(_object)
-                child_char = get_char_objects(_object)
-                char.extend(child_char)
-            elif isinstance(_object, LTTextLineVertical):
-                vertical_text.append(_object)
-                child_char = get_char_objects(_object)
-                char.extend(child_char)
-            elif isinstance(_object, LTContainer):
-                child_char, child_horizontal_text, child_vertical_text = get_char_and_text_objects(_object)
-                char.extend(child_char)
-                horizontal_text.extend(child_horizontal_text)
-                vertical_text.extend(child_vertical_text)
-    except AttributeError:
-        pass
+
+def get_char_and_text_objects(layout: LTContainer) -> Tuple[
+    List[LTChar], List[LTTextLineHorizontal], List[LTTextLineVertical]]:
+    """Parses pdf layout to get a list of PDFMiner LTChar,
+    LTTextLineHorizontal, LTTextLineVertical objects.
+
+    Parameters
+    ----------
+    layout : object
+        PDFMiner LTContainer object
+            ( LTPage, LTTextLineHorizontal, LTTextLineVertical).
+
+    Returns
+    -------
+    result : tuple
+        Include List of LTChar objects, list of LTTextLineHorizontal objects
+        and list of LTTextLineVertical objects
+
+    """
+    __, char, horizontal_text, vertical_text = get_all_objects(layout)
     return char, horizontal_text, vertical_text
 
 
@@ -1014,8 +1309,8 @@ def get_char_objects(layout: LTContainer) -> List[LTChar]:
 
 def get_image_and_text_objects(layout: LTContainer) -> Tuple[
     List[LTImage], List[LTTextLineHorizontal], List[LTTextLineVertical]]:
-    """Recursively parses pdf layout to get a list of
-    PDFMiner LTImage, LTTextLineHorizontal, LTTextLineVertical objects.
+    """Parses pdf layout to get a list of PDFMiner LTImage,
+    LTTextLineHorizontal, LTTextLineVertical objects.
 
     Parameters
     ----------
@@ -1030,24 +1325,5 @@ def get_image_and_text_objects(layout: LTContainer) -> Tuple[
         and list of LTTextLineVertical objects
 
     """
-
-    image = []
-    horizontal_text = []
-    vertical_text = []
-
-    try:
-        for _object in layout:
-            if isinstance(_object, LTImage):
-                image.append(_object)
-            elif isinstance(_object, LTTextLineHorizontal):
-                horizontal_text.append(_object)
-            elif isinstance(_object, LTTextLineVertical):
-                vertical_text.append(_object)
-            elif isinstance(_object, LTContainer):
-                child_image, child_horizontal_text, child_vertical_text = get_char_and_text_objects(_object)
-                image.extend(child_image)
-                horizontal_text.extend(child_horizontal_text)
-                vertical_text.extend(child_vertical_text)
-    except AttributeError:
-        pass
+    image, __, horizontal_text, vertical_text = get_all_objects(layout)
     return image, horizontal_text, vertical_text
@@ -20,7 +20,7 @@ requires = [
     "openpyxl>=2.5.8",
     "pandas>=0.23.4",
     "pdfminer.six>=20200726",
-    "PyPDF2>=1.26.0",
+    "pikepdf>=3.0.0",
     "tabulate>=0.8.9",
 ]
 
@@ -30,6 +30,10 @@ plot_requires = [
     "matplotlib>=2.2.3",
 ]
 
+fitz_requires = [
+    "PyMuPDF>=1.18.0",
+]
+
 dev_requires = [
     "codecov>=2.0.15",
     "pytest>=5.4.3",
@@ -62,6 +66,7 @@ def setup_package():
             "base": base_requires,
             "cv": base_requires,  # deprecate
             "dev": dev_requires,
+            "fitz": fitz_requires,
             "plot": plot_requires,
         },
         entry_points={
@@ -5,6 +5,7 @@ import sys
 
 import pytest
 import pandas as pd
+import pikepdf
 from pandas.testing import assert_frame_equal
 
 import camelot
@@ -12,6 +13,15 @@ from camelot.io import PDFHandler
 from camelot.core import Table, TableList
 from camelot.__version__ import generate_version
 from camelot.backends import ImageConversionBackend
+from camelot.utils import (
+    _HAS_FITZ,
+    get_all_objects,
+    get_page_layout,
+    get_char_and_text_objects,
+    get_rotation,
+    get_rotation_with_fitz,
+    get_text_objects,
+)
 
 from .data import *
 
@@ -172,3 +182,232 @@ def test_handler_pages_generator():
 
     handler = PDFHandler(filename)
     assert handler._get_pages("1,2,5-10") == [1, 2, 5, 6, 7, 8, 9, 10]
+
+    handler = PDFHandler(filename)
+    assert handler._get_pages("3000,1-2000,1500-2500") == list(range(1, 2501)) + [3000]
+
+
+def test_handler_opens_pdf_lazily():
+    filename = os.path.join(testdir, "foo.pdf")
+
+    with PDFHandler(filename, pages="1,2,5-10") as handler:
+        assert handler._reader is None
+
+    with PDFHandler(filename, pages="1-end") as handler:
+        assert handler._reader is not None
+        assert handler._get_num_pages() == 1
+    assert handler._reader is None
+
+
+def test_handler_decrypts_pdf_once(monkeypatch):
+    import camelot.handlers
+
+    calls = []
+    pikepdf_open = camelot.handlers.pikepdf.open
+
+    def counting_open(*args, **kwargs):
+        calls.append(args)
+        return pikepdf_open(*args, **kwargs)
+
+    monkeypatch.setattr(camelot.handlers.pikepdf, "open", counting_open)
+
+    filename = os.path.join(testdir, "health_protected.pdf")
+    with PDFHandler(filename, pages="1-end", password="userpass") as handler:
+        assert handler._get_num_pages() == 1
+        tables = handler.parse(flavor="stream")
+    assert len(tables) == 1
+    assert len(calls) == 1
+
+
+def test_handler_may_be_rotated(tmpdir):
+    for name, may_be_rotated in [
+        ("foo.pdf", False),
+        ("clockwise_table_2.pdf", True),
+        ("anticlockwise_table_2.pdf", True),
+    ]:
+        filename = os.path.join(testdir, name)
+        with pikepdf.open(filename) as pdf:
+            assert PDFHandler._may_be_rotated(pdf.pages[0]) == may_be_rotated
+
+    filename = os.path.join(testdir, "health.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream")
+    tables_forced = camelot.read_pdf(
+        filename, flavor="stream", force_layout_rotation=True
+    )
+    assert_frame_equal(tables[0].df, tables_forced[0].df)
+
+    damaged = str(tmpdir.join("health_bad_cm.pdf"))
+    with pikepdf.open(filename) as pdf:
+        page = pdf.pages[0]
+        page.contents_add(pikepdf.Stream(pdf, b"/A /B 0 0 0 0 cm\n"), prepend=True)
+        # a malformed matrix is left to the probe
+        assert PDFHandler._may_be_rotated(page)
+        pdf.save(damaged)
+    tables_damaged = camelot.read_pdf(damaged, flavor="stream")
+    assert_frame_equal(tables[0].df, tables_damaged[0].df)
+
+
+def test_handler_session(monkeypatch):
+    import camelot.handlers
+
+    calls = []
+    page_layout = camelot.handlers.get_page_layout
+
+    def counting_layout(*args, **kwargs):
+        calls.append(args)
+        return page_layout(*args, **kwargs)
+
+    monkeypatch.setattr(camelot.handlers, "get_page_layout", counting_layout)
+
+    filename = os.path.join(testdir, "tabula/schools.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream", pages="all")
+    n_layouts = len(calls)
+
+    with PDFHandler(filename, pages="all") as handler:
+        tempdir = handler._session.name
+        for __ in range(2):
+            session_tables = handler.parse(flavor="stream")
+            assert len(session_tables) == len(tables)
+            for table, session_table in zip(tables, session_tables):
+                assert_frame_equal(table.df, session_table.df)
+        assert len(calls) == 2 * n_layouts
+
+        # pages are laid out again when the layout changes
+        handler.parse(flavor="stream", layout_kwargs={"detect_vertical": False})
+        assert len(calls) == 2 * n_layouts + 5
+    assert not os.path.exists(tempdir)
+
+
+@pytest.mark.skipif(not _HAS_FITZ, reason="PyMuPDF is not installed")
+def test_handler_repairs_damaged_pdf():
+    # pikepdf cannot find the /Root dictionary of this file
+    filename = os.path.join(testdir, "agstat.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream")
+    assert len(tables) == 1
+    assert tables[0].shape == (31, 11)
+
+
+def test_get_rotation():
+    class Line(object):
+        def __init__(self, text):
+            self.text = text
+
+        def get_text(self):
+            return self.text
+
+    class Char(object):
+        def __init__(self, b, c):
+            self.matrix = (0, b, c, 0, 0, 0)
+
+    horizontal_text = [Line("a"), Line(" ")]
+    vertical_text = [Line("b"), Line("c")]
+    clockwise = [Char(-1, 1)] * 3
+    anticlockwise = [Char(1, -1)] * 2
+    upright = [Char(0, 0)] * 5
+
+    assert get_rotation(clockwise, horizontal_text * 2, vertical_text) == ""
+    assert (
+        get_rotation(clockwise + anticlockwise, horizontal_text, vertical_text)
+        == "clockwise"
+    )
+    assert (
+        get_rotation(upright + anticlockwise, horizontal_text, vertical_text)
+        == "anticlockwise"
+    )
+    assert get_rotation([], horizontal_text, vertical_text) == "clockwise"
+
+
+@pytest.mark.skipif(not _HAS_FITZ, reason="PyMuPDF is not installed")
+def test_rotation_with_fitz():
+    for name, rotation in [
+        ("foo.pdf", ""),
+        ("clockwise_table_2.pdf", "clockwise"),
+        ("anticlockwise_table_2.pdf", "anticlockwise"),
+    ]:
+        filename = os.path.join(testdir, name)
+        layout, __ = get_page_layout(filename)
+        chars, horizontal_text, vertical_text = get_char_and_text_objects(layout)
+        assert get_rotation(chars, horizontal_text, vertical_text) == rotation
+        assert get_rotation_with_fitz(filename) == rotation
+
+
+@pytest.mark.skipif(not _HAS_FITZ, reason="PyMuPDF is not installed")
+def test_rotation_with_fitz_quiet(capfd):
+    filename = os.path.join(
+        testdir, "tabula/icdar2013-dataset/competition-dataset-us/us-006.pdf"
+    )
+    tables = camelot.read_pdf(
+        filename, flavor="stream", suppress_stdout=True, force_layout_rotation=True
+    )
+    assert len(tables) == 1
+    assert "MuPDF error" not in capfd.readouterr().err
+
+
+@pytest.mark.skipif(not _HAS_FITZ, reason="PyMuPDF is not installed")
+def test_rotation_with_fitz_fallback(monkeypatch):
+    import camelot.handlers
+
+    def broken(page):
+        raise RuntimeError("cannot read page")
+
+    monkeypatch.setattr(camelot.handlers, "get_page_rotation_with_fitz", broken)
+
+    df = pd.DataFrame(data_stream_table_rotated)
+    filename = os.path.join(testdir, "clockwise_table_2.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream")
+    assert_frame_equal(df, tables[0].df)
+
+
+def test_get_all_objects():
+    filename = os.path.join(testdir, "clockwise_table_2.pdf")
+    layout, __ = get_page_layout(filename)
+    images, chars, horizontal_text, vertical_text = get_all_objects(layout)
+
+    assert images == get_text_objects(layout, ltype="image")
+    assert chars == get_text_objects(layout, ltype="char")
+    assert horizontal_text == get_text_objects(layout, ltype="horizontal_text")
+    assert vertical_text == get_text_objects(layout, ltype="vertical_text")
+
+
+def test_layout_cache(tmpdir, monkeypatch):
+    import camelot.handlers
+
+    df = pd.DataFrame(data_stream_table_rotated)
+    cache_dir = str(tmpdir.join("cache"))
+
+    filename = os.path.join(testdir, "clockwise_table_2.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream", cache_dir=cache_dir)
+    assert_frame_equal(df, tables[0].df)
+    assert len(os.listdir(cache_dir)) == 1
+
+    tables = camelot.read_pdf(filename, flavor="stream", cache_dir=cache_dir)
+    assert_frame_equal(df, tables[0].df)
+
+    # different layout kwargs are cached separately
+    camelot.read_pdf(
+        filename, flavor="stream", cache_dir=cache_dir, layout_kwargs={"char_margin": 2}
+    )
+    assert len(os.listdir(cache_dir)) == 2
+
+    # a forced probe does not reuse the rotation of a skipped probe
+    probes = []
+
+    def counting(probe):
+        def wrapper(*args, **kwargs):
+            probes.append(args)
+            return probe(*args, **kwargs)
+
+        return wrapper
+
+    for name in ["get_page_rotation_with_fitz", "get_rotation"]:
+        monkeypatch.setattr(
+            camelot.handlers, name, counting(getattr(camelot.handlers, name))
+        )
+
+    filename = os.path.join(testdir, "foo.pdf")
+    camelot.read_pdf(filename, flavor="stream", cache_dir=cache_dir)
+    assert len(probes) == 0
+    camelot.read_pdf(
+        filename, flavor="stream", cache_dir=cache_dir, force_layout_rotation=True
+    )
+    assert len(probes) == 1
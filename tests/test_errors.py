@@ -153,3 +153,13 @@ def test_lattice_ghostscript_deprecation_warning():
         with pytest.raises(DeprecationWarning) as e:
             tables = camelot.read_pdf(filename)
             assert str(e.value) == ghostscript_deprecation_warning
+
+
+def test_damaged_pdf_without_fitz(monkeypatch):
+    import camelot.handlers
+
+    monkeypatch.setattr(camelot.handlers, "_HAS_FITZ", False)
+    filename = os.path.join(testdir, "agstat.pdf")
+    message = "file is damaged and could not be read"
+    with pytest.raises(ValueError, match=message):
+        tables = camelot.read_pdf(filename, flavor="stream")
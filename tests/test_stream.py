@@ -131,3 +131,45 @@ def test_stream_duplicated_text():
     filename = os.path.join(testdir, "birdisland.pdf")
     tables = camelot.read_pdf(filename, flavor="stream")
     assert_frame_equal(df, tables[0].df)
+
+
+def test_stream_n_jobs():
+    filename = os.path.join(testdir, "tabula/schools.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream", pages="all")
+    progress = []
+    tables_parallel = camelot.read_pdf(
+        filename,
+        flavor="stream",
+        pages="all",
+        n_jobs=2,
+        progress_callback=lambda *args: progress.append(args),
+    )
+    assert progress == [(i, 5, i) for i in range(1, 6)]
+
+    page_order = [(t.page, t.order) for t in tables]
+    assert page_order == sorted(page_order)
+    assert len(tables) == len(tables_parallel)
+    for table, table_parallel in zip(tables, tables_parallel):
+        assert (table.page, table.order) == (table_parallel.page, table_parallel.order)
+        assert_frame_equal(table.df, table_parallel.df)
+
+
+def test_stream_on_page_tables():
+    filename = os.path.join(testdir, "tabula/schools.pdf")
+    tables = camelot.read_pdf(filename, flavor="stream", pages="all")
+
+    for n_jobs in [1, 2]:
+        page_tables = []
+        result = camelot.read_pdf(
+            filename,
+            flavor="stream",
+            pages="all",
+            n_jobs=n_jobs,
+            on_page_tables=lambda page, t: page_tables.append((page, t)),
+        )
+        assert result.n == 0
+        assert [page for page, __ in page_tables] == [1, 2, 3, 4, 5]
+        streamed = [table for __, t in page_tables for table in t]
+        assert len(streamed) == len(tables)
+        for table, table_streamed in zip(tables, streamed):
+            assert_frame_equal(table.df, table_streamed.df)